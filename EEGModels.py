@@ -1,328 +1,589 @@
-#!/usr/bin/env python
-# -*- coding: utf-8 -*-
-
-import model
-from tensorflow.keras import backend as K
-from tensorflow.keras.constraints import max_norm
-from tensorflow.keras.layers import BatchNormalization
-from tensorflow.keras.layers import Conv2D, MaxPooling2D, AveragePooling2D
-from tensorflow.keras.layers import Dense, Activation, Dropout
-from tensorflow.keras.layers import Input, Flatten
-from tensorflow.keras.layers import SeparableConv2D, DepthwiseConv2D
-from tensorflow.keras.layers import SpatialDropout2D
-from tensorflow.keras.models import Model
-
-from tensorflow.keras.layers import concatenate
-
-"""
-The author of this model is Karel Roots and was published along with the paper titled 
-"Fusion Convolutional Neural Network for Cross-Subject EEG Motor Imagery Classification"
-"""
-
-def EEGNet_fusion(nb_classes, Chans=64, Samples=128,
-                  dropoutRate=0.5, norm_rate=0.25, dropoutType='Dropout', cpu=False):
-    if dropoutType == 'SpatialDropout2D':
-        dropoutType = SpatialDropout2D
-    elif dropoutType == 'Dropout':
-        dropoutType = Dropout
-    else:
-        raise ValueError('dropoutType must be one of SpatialDropout2D '
-                         'or Dropout, passed as a string.')
-    if cpu:
-        input_shape = (Samples, Chans, 1)
-        conv_filters = (64, 1)
-        conv_filters2 = (96, 1)
-        conv_filters3 = (128, 1)
-
-        depth_filters = (1, Chans)
-        pool_size = (4, 1)
-        pool_size2 = (8, 1)
-        separable_filters = (8, 1)
-        separable_filters2 = (16, 1)
-        separable_filters3 = (32, 1)
-
-        axis = -1
-    else:
-        input_shape = (1, Chans, Samples)
-        conv_filters = (1, 64)
-        conv_filters2 = (1, 96)
-        conv_filters3 = (1, 128)
-
-        depth_filters = (Chans, 1)
-        pool_size = (1, 4)
-        pool_size2 = (1, 8)
-        separable_filters = (1, 8)
-        separable_filters2 = (1, 16)
-        separable_filters3 = (1, 32)
-
-        axis = 1
-
-    F1 = 8
-    F1_2 = 16
-    F1_3 = 32
-    F2 = 16
-    F2_2 = 32
-    F2_3 = 64
-    D = 2
-    D2 = 2
-    D3 = 2
-
-    input1 = Input(shape=input_shape)
-    block1 = Conv2D(F1, conv_filters, padding='same',
-                    input_shape=input_shape,
-                    use_bias=False)(input1)
-    block1 = BatchNormalization(axis=axis)(block1)
-    block1 = DepthwiseConv2D(depth_filters, use_bias=False,
-                             depth_multiplier=D,
-                             depthwise_constraint=max_norm(1.))(block1)
-    block1 = BatchNormalization(axis=axis)(block1)
-    block1 = Activation('elu')(block1)
-    block1 = AveragePooling2D(pool_size)(block1)
-    block1 = dropoutType(dropoutRate)(block1)
-
-    block2 = SeparableConv2D(F2, separable_filters,
-                             use_bias=False, padding='same')(block1)  # 8
-    block2 = BatchNormalization(axis=axis)(block2)
-    block2 = Activation('elu')(block2)
-    block2 = AveragePooling2D(pool_size2)(block2)
-    block2 = dropoutType(dropoutRate)(block2)
-    block2 = Flatten()(block2)  # 13
-
-    # 8 - 13
-
-    input2 = Input(shape=input_shape)
-    block3 = Conv2D(F1_2, conv_filters2, padding='same',
-                    input_shape=input_shape,
-                    use_bias=False)(input2)
-    block3 = BatchNormalization(axis=axis)(block3)
-    block3 = DepthwiseConv2D(depth_filters, use_bias=False,
-                             depth_multiplier=D2,
-                             depthwise_constraint=max_norm(1.))(block3)
-    block3 = BatchNormalization(axis=axis)(block3)
-    block3 = Activation('elu')(block3)
-    block3 = AveragePooling2D(pool_size)(block3)
-    block3 = dropoutType(dropoutRate)(block3)
-
-    block4 = SeparableConv2D(F2_2, separable_filters2,
-                             use_bias=False, padding='same')(block3)  # 22
-    block4 = BatchNormalization(axis=axis)(block4)
-    block4 = Activation('elu')(block4)
-    block4 = AveragePooling2D(pool_size2)(block4)
-    block4 = dropoutType(dropoutRate)(block4)
-    block4 = Flatten()(block4)  # 27
-    # 22 - 27
-
-    input3 = Input(shape=input_shape)
-    block5 = Conv2D(F1_3, conv_filters3, padding='same',
-                    input_shape=input_shape,
-                    use_bias=False)(input3)
-    block5 = BatchNormalization(axis=axis)(block5)
-    block5 = DepthwiseConv2D(depth_filters, use_bias=False,
-                             depth_multiplier=D3,
-                             depthwise_constraint=max_norm(1.))(block5)
-    block5 = BatchNormalization(axis=axis)(block5)
-    block5 = Activation('elu')(block5)
-    block5 = AveragePooling2D(pool_size)(block5)
-    block5 = dropoutType(dropoutRate)(block5)
-
-    block6 = SeparableConv2D(F2_3, separable_filters3,
-                             use_bias=False, padding='same')(block5)  # 36
-    block6 = BatchNormalization(axis=axis)(block6)
-    block6 = Activation('elu')(block6)
-    block6 = AveragePooling2D(pool_size2)(block6)
-    block6 = dropoutType(dropoutRate)(block6)
-    block6 = Flatten()(block6)  # 41
-
-    # 36 - 41
-
-    merge_one = concatenate([block2, block4])
-    merge_two = concatenate([merge_one, block6])
-
-    flatten = Flatten()(merge_two)
-
-    dense = Dense(nb_classes, name='dense',
-                  kernel_constraint=max_norm(norm_rate))(flatten)
-
-    softmax = Activation('softmax', name='softmax')(dense)
-
-    return Model(inputs=[input1, input2, input3], outputs=softmax)
-
-
-"""
-The implementation of the following models is credited to the Army Research Laboratory (ARL)
-Source: https://github.com/vlawhern/arl-eegmodels
-"""
-
-def EEGNet(nb_classes, Chans=64, Samples=128,
-           dropoutRate=0.5, kernLength=64, F1=8,
-           D=2, F2=16, norm_rate=0.25, dropoutType='Dropout', cpu=False):
-    if dropoutType == 'SpatialDropout2D':
-        dropoutType = SpatialDropout2D
-    elif dropoutType == 'Dropout':
-        dropoutType = Dropout
-    else:
-        raise ValueError('dropoutType must be one of SpatialDropout2D '
-                         'or Dropout, passed as a string.')
-
-    if cpu:
-        input_shape = (Samples, Chans, 1)
-        conv_filters = (kernLength, 1)
-        depth_filters = (1, Chans)
-        pool_size = (6, 1)
-        pool_size2 = (12, 1)
-        separable_filters = (20, 1)
-        axis = -1
-    else:
-        input_shape = (1, Chans, Samples)
-        conv_filters = (1, kernLength)
-        depth_filters = (Chans, 1)
-        pool_size = (1, 6)
-        pool_size2 = (1, 12)
-        separable_filters = (1, 20)
-        axis = 1
-
-    input1 = Input(shape=input_shape)
-    block1 = Conv2D(F1, conv_filters, padding='same',
-                    input_shape=input_shape,
-                    use_bias=False)(input1)
-    block1 = BatchNormalization(axis=axis)(block1)
-    block1 = DepthwiseConv2D(depth_filters, use_bias=False,
-                             depth_multiplier=D,
-                             depthwise_constraint=max_norm(1.))(block1)
-    block1 = BatchNormalization(axis=axis)(block1)
-    block1 = Activation('elu')(block1)
-    block1 = AveragePooling2D(pool_size)(block1)
-    block1 = dropoutType(dropoutRate)(block1)
-
-    block2 = SeparableConv2D(F2, separable_filters,
-                             use_bias=False, padding='same')(block1)
-    block2 = BatchNormalization(axis=axis)(block2)
-    block2 = Activation('elu')(block2)
-    block2 = AveragePooling2D(pool_size2)(block2)
-    block2 = dropoutType(dropoutRate)(block2)
-
-    flatten = Flatten(name='flatten')(block2)
-
-    dense = Dense(nb_classes, name='dense',
-                  kernel_constraint=max_norm(norm_rate))(flatten)
-    softmax = Activation('softmax', name='softmax')(dense)
-
-    return Model(inputs=input1, outputs=softmax)
-
-
-def DeepConvNet(nb_classes, Chans=64, Samples=256,
-                dropoutRate=0.5, cpu=False):
-    if cpu:
-        input_shape = (Samples, Chans, 1)
-        input_main = Input(input_shape)
-        conv_filters = (2, 1)
-        conv_filters2 = (1, Chans)
-        pool = (2, 1)
-        strides = (2, 1)
-        axis = -1
-    else:
-        input_shape = (1, Chans, Samples)
-        input_main = Input(input_shape)
-        conv_filters = (1, 2)
-        conv_filters2 = (Chans, 1)
-        pool = (1, 2)
-        strides = (1, 2)
-        axis = 1
-
-    # start the model
-    block1 = Conv2D(25, conv_filters,
-                    input_shape=input_shape,
-                    kernel_constraint=max_norm(2., axis=(0, 1, 2)))(input_main)
-    block1 = Conv2D(25, conv_filters2,
-                    kernel_constraint=max_norm(2., axis=(0, 1, 2)))(block1)
-    block1 = BatchNormalization(axis=axis, epsilon=1e-05, momentum=0.1)(block1)
-    block1 = Activation('elu')(block1)
-    block1 = MaxPooling2D(pool_size=pool, strides=strides)(block1)
-    block1 = Dropout(dropoutRate)(block1)
-
-    block2 = Conv2D(50, conv_filters,
-                    kernel_constraint=max_norm(2., axis=(0, 1, 2)))(block1)
-    block2 = BatchNormalization(axis=axis, epsilon=1e-05, momentum=0.1)(block2)
-    block2 = Activation('elu')(block2)
-    block2 = MaxPooling2D(pool_size=pool, strides=strides)(block2)
-    block2 = Dropout(dropoutRate)(block2)
-
-    block3 = Conv2D(100, conv_filters,
-                    kernel_constraint=max_norm(2., axis=(0, 1, 2)))(block2)
-    block3 = BatchNormalization(axis=axis, epsilon=1e-05, momentum=0.1)(block3)
-    block3 = Activation('elu')(block3)
-    block3 = MaxPooling2D(pool_size=pool, strides=strides)(block3)
-    block3 = Dropout(dropoutRate)(block3)
-
-    block4 = Conv2D(200, conv_filters,
-                    kernel_constraint=max_norm(2., axis=(0, 1, 2)))(block3)
-    block4 = BatchNormalization(axis=axis, epsilon=1e-05, momentum=0.1)(block4)
-    block4 = Activation('elu')(block4)
-    block4 = MaxPooling2D(pool_size=pool, strides=strides)(block4)
-    block4 = Dropout(dropoutRate)(block4)
-
-    flatten = Flatten()(block4)
-
-    dense = Dense(nb_classes, kernel_constraint=max_norm(0.5))(flatten)
-    softmax = Activation('softmax')(dense)
-
-    return Model(inputs=input_main, outputs=softmax)
-
-
-# need these for ShallowConvNet
-def square(x):
-    return K.square(x)
-
-
-def log(x):
-    return K.log(K.clip(x, min_value=1e-7, max_value=10000))
-
-
-def ShallowConvNet(nb_classes, Chans=64, Samples=128, dropoutRate=0.5, cpu=False):
-    if cpu:
-        input_shape = (Samples, Chans, 1)
-        conv_filters = (25, 1)
-        conv_filters2 = (1, Chans)
-        pool_size = (45, 1)
-        strides = (15, 1)
-        axis = -1
-    else:
-        input_shape = (1, Chans, Samples)
-        conv_filters = (1, 20)
-        conv_filters2 = (Chans, 1)
-        pool_size = (1, 45)
-        strides = (1, 15)
-        axis = 1
-
-    input_main = Input(input_shape)
-    block1 = Conv2D(20, conv_filters,
-                    input_shape=input_shape,
-                    kernel_constraint=max_norm(2., axis=(0, 1, 2)))(input_main)
-    block1 = Conv2D(20, conv_filters2, use_bias=False,
-                    kernel_constraint=max_norm(2., axis=(0, 1, 2)))(block1)
-    block1 = BatchNormalization(axis=axis, epsilon=1e-05, momentum=0.1)(block1)
-    block1 = Activation(square)(block1)
-    block1 = AveragePooling2D(pool_size=pool_size, strides=strides)(block1)
-    block1 = Activation(log)(block1)
-    block1 = Dropout(dropoutRate)(block1)
-    flatten = Flatten()(block1)
-    dense = Dense(nb_classes, kernel_constraint=max_norm(0.5))(flatten)
-    softmax = Activation('softmax')(dense)
-
-    return Model(inputs=input_main, outputs=softmax)
-
-
-def get_models(trial_type, nb_classes, samples, use_cpu):
-    if use_cpu:
-        K.set_image_data_format('channels_last')
-    else:
-        K.set_image_data_format('channels_first')
-    return {
-        'EEGNet_fusion': model.Model('EEGNet_fusion', trial_type, [(0, 8), (14, 22), (28, 36)],
-                                     EEGNet_fusion(nb_classes, Samples=samples, cpu=use_cpu), multi_branch=True),
-        'EEGNet': model.Model('EEGNet', trial_type, [(0, 8)], EEGNet(nb_classes, Samples=samples, cpu=use_cpu)),
-        'ShallowConvNet': model.Model('ShallowConvNet', trial_type, [(0, 2)],
-                                      ShallowConvNet(nb_classes, Samples=samples, cpu=use_cpu)),
-        'DeepConvNet': model.Model('DeepConvNet', trial_type, [(0, 8), (14, 22), (28, 36)],
-                                   DeepConvNet(nb_classes, Samples=samples, cpu=use_cpu)),
-    }
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import functools
+import os
+import warnings
+
+# cuDNN algorithm toggles have to be in place before TensorFlow initializes:
+# the autotuner is what selects Winograd (and the FFT algo for long temporal
+# kernels), and the nonfused Winograd kernels are opt-in.
+os.environ.setdefault('TF_CUDNN_USE_AUTOTUNE', '1')
+os.environ.setdefault('TF_ENABLE_WINOGRAD_NONFUSED', '1')
+
+import tensorflow as tf
+
+import model
+from tensorflow.keras import backend as K
+from tensorflow.keras import callbacks
+from tensorflow.keras import mixed_precision
+from tensorflow.keras.constraints import max_norm
+from tensorflow.keras.layers import BatchNormalization
+from tensorflow.keras.layers import Conv2D, AveragePooling2D
+from tensorflow.keras.layers import Dense, Activation, Dropout
+from tensorflow.keras.layers import Input, Flatten, Layer
+from tensorflow.keras.layers import DepthwiseConv2D
+from tensorflow.keras.layers import SpatialDropout2D
+from tensorflow.keras.models import Model, clone_model
+from tensorflow.keras.utils import get_custom_objects
+
+from tensorflow.keras.layers import concatenate
+
+# All models are built in the NHWC ("channels_last") layout. cuDNN's depthwise /
+# separable convolution kernels and its fused BatchNorm are materially faster in
+# NHWC on modern GPUs (NCHW inputs get transposed internally), and channels_last
+# is also the TensorFlow default on CPU, so a single layout serves both devices.
+K.set_image_data_format('channels_last')
+
+# Train in mixed precision: fp16 activations halve the memory traffic of the
+# depthwise/separable blocks and enable Tensor Cores for the dense Conv2D
+# models, while BatchNorm statistics and the final Dense + softmax stay in
+# fp32 to keep the loss computation numerically stable.
+mixed_precision.set_global_policy('mixed_float16')
+
+# Let Grappler re-lay-out any op the builders leave in a cuDNN-unfriendly
+# format rather than paying for hidden transposes at runtime.
+tf.config.optimizer.set_experimental_options({'layout_optimizer': True})
+
+
+def _round_up8(n):
+    """Round n up to the next multiple of 8.
+
+    Tensor Core GEMMs need fp16 channel/logit counts that are multiples of
+    8; misaligned widths silently fall back to the much slower non-Tensor-
+    Core kernels.
+    """
+    return -(-n // 8) * 8
+
+
+class FFTConv1D_Temporal(Layer):
+    """Temporal convolution computed as a spectral multiply.
+
+    When the temporal kernel is about as long as the signal itself, a direct
+    im2col convolution costs O(F1 * Chans * Samples * kernLength) MACs while
+    an rFFT per channel plus a frequency-domain multiply costs only
+    O(F1 * Samples * log Samples). The filter bank is learned directly in the
+    frequency domain as a real/imaginary tensor pair. Input is expected in
+    the (trials, Samples, Chans, 1) layout and the output matches the shape a
+    padding='same' Conv2D(filters, (kernLength, 1)) would produce. The layer
+    runs in float32 since tf.signal has no fp16 kernels.
+    """
+
+    def __init__(self, filters, **kwargs):
+        kwargs.setdefault('dtype', 'float32')
+        super(FFTConv1D_Temporal, self).__init__(**kwargs)
+        self.filters = filters
+
+    def build(self, input_shape):
+        self.samples = int(input_shape[1])
+        bins = self.samples // 2 + 1
+        self.kernel_real = self.add_weight(name='kernel_real',
+                                           shape=(self.filters, bins),
+                                           initializer='glorot_uniform')
+        self.kernel_imag = self.add_weight(name='kernel_imag',
+                                           shape=(self.filters, bins),
+                                           initializer='glorot_uniform')
+        super(FFTConv1D_Temporal, self).build(input_shape)
+
+    def call(self, inputs):
+        x = tf.squeeze(inputs, axis=-1)      # (N, Samples, Chans)
+        x = tf.transpose(x, perm=[0, 2, 1])  # (N, Chans, Samples)
+        spectrum = tf.signal.rfft(x)
+        kernel = tf.complex(self.kernel_real, self.kernel_imag)
+        filtered = tf.einsum('ncb,fb->nfcb', spectrum, kernel)
+        y = tf.signal.irfft(filtered, fft_length=[self.samples])
+        return tf.transpose(y, perm=[0, 3, 2, 1])  # (N, Samples, Chans, filters)
+
+    def get_config(self):
+        config = super(FFTConv1D_Temporal, self).get_config()
+        config.update({'filters': self.filters})
+        return config
+
+
+class SpatialDepthwiseMatmul(Layer):
+    """Depthwise spatial filter expressed as a batched matmul.
+
+    The (1, Chans) DepthwiseConv2D used as the spatial filter produces one
+    output column per input filter - a degenerate case that cuDNN's depthwise
+    kernels handle poorly. The identical contraction written as an einsum
+    dispatches to the cuBLAS batched-GEMM path instead. Equivalent to
+    DepthwiseConv2D((1, Chans), depth_multiplier=D, use_bias=False,
+    depthwise_constraint=max_norm(1.)) applied to a
+    (trials, Samples, Chans, F1) tensor, giving (trials, Samples, 1, F1 * D).
+    """
+
+    def __init__(self, depth_multiplier=1, **kwargs):
+        super(SpatialDepthwiseMatmul, self).__init__(**kwargs)
+        self.depth_multiplier = depth_multiplier
+
+    def build(self, input_shape):
+        self.samples = int(input_shape[1])
+        self.chans = int(input_shape[2])
+        self.in_filters = int(input_shape[3])
+        self.depthwise_kernel = self.add_weight(
+            name='depthwise_kernel',
+            shape=(self.in_filters, self.depth_multiplier, self.chans),
+            initializer='glorot_uniform',
+            constraint=max_norm(1., axis=2))
+        super(SpatialDepthwiseMatmul, self).build(input_shape)
+
+    def call(self, inputs):
+        outputs = tf.einsum('nscf,fdc->nsfd', inputs, self.depthwise_kernel)
+        return tf.reshape(outputs, (-1, self.samples, 1,
+                                    self.in_filters * self.depth_multiplier))
+
+    def get_config(self):
+        config = super(SpatialDepthwiseMatmul, self).get_config()
+        config.update({'depth_multiplier': self.depth_multiplier})
+        return config
+
+
+class LogSquarePool(Layer):
+    """Fused square -> average pool -> clipped log epilogue.
+
+    ShallowConvNet's defining motif is Activation(square) ->
+    AveragePooling2D -> Activation(log), which costs three kernel launches
+    and writes the full-resolution squared tensor to memory in between.
+    Computing the whole sandwich inside one XLA-compiled function lets the
+    square, the pooling reduction and the clip + log fuse into a single pass
+    over the feature map.
+    """
+
+    def __init__(self, pool_size, strides, **kwargs):
+        super(LogSquarePool, self).__init__(**kwargs)
+        self.pool_size = tuple(pool_size)
+        self.strides = tuple(strides)
+
+    @tf.function(jit_compile=True)
+    def call(self, inputs):
+        pooled = tf.nn.avg_pool2d(tf.square(inputs), self.pool_size,
+                                  self.strides, 'VALID')
+        return tf.math.log(tf.clip_by_value(pooled, 1e-7, 10000))
+
+    def get_config(self):
+        config = super(LogSquarePool, self).get_config()
+        config.update({'pool_size': self.pool_size, 'strides': self.strides})
+        return config
+
+
+class MaxNormCallback(callbacks.Callback):
+    """Applies max-norm weight clipping as one batched post-step op.
+
+    Per-layer kernel_constraints launch a separate tiny norm-reduction and
+    projection kernel for every constrained layer after each train step.
+    This callback clips every Conv2D kernel of the model inside a single
+    tf.function instead, so DeepConvNet's five (and ShallowConvNet's two)
+    constraint launches collapse into one. The projection matches
+    max_norm(max_value, axis=axes) exactly.
+    """
+
+    def __init__(self, max_value=2., axes=(0, 1, 2)):
+        super(MaxNormCallback, self).__init__()
+        self.max_value = max_value
+        self.axes = list(axes)
+        self._clip = None
+
+    def set_model(self, net):
+        super(MaxNormCallback, self).set_model(net)
+        kernels = [layer.kernel for layer in net.layers
+                   if isinstance(layer, Conv2D)]
+
+        @tf.function
+        def clip_all():
+            for kernel in kernels:
+                norms = tf.sqrt(tf.reduce_sum(tf.square(kernel),
+                                              axis=self.axes, keepdims=True))
+                desired = tf.clip_by_value(norms, 0, self.max_value)
+                kernel.assign(kernel * (desired / (K.epsilon() + norms)))
+
+        self._clip = clip_all
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._clip()
+
+
+"""
+The author of this model is Karel Roots and was published along with the paper titled
+"Fusion Convolutional Neural Network for Cross-Subject EEG Motor Imagery Classification"
+"""
+
+# The public builders below delegate to lru_cached template constructors and
+# clone the cached topology. Cross-subject sweeps request the same
+# architecture dozens of times; cloning skips re-running the Keras layer
+# graph construction while still handing every caller freshly initialized
+# weights. The active precision policy is part of each cache key because
+# layer dtypes are baked in at construction time.
+
+
+@functools.lru_cache(maxsize=32)
+def _eegnet_fusion_template(nb_classes, Chans, Samples, dropoutRate,
+                            norm_rate, dropoutType, inference, policy):
+    if dropoutType == 'SpatialDropout2D':
+        dropoutType = SpatialDropout2D
+    elif dropoutType == 'Dropout':
+        dropoutType = Dropout
+    else:
+        raise ValueError('dropoutType must be one of SpatialDropout2D '
+                         'or Dropout, passed as a string.')
+
+    input_shape = (Samples, Chans, 1)
+    conv_filters3 = (128, 1)
+
+    pool_size = (4, 1)
+    pool_size2 = (8, 1)
+    separable_filters = (8, 1)
+    separable_filters2 = (16, 1)
+    separable_filters3 = (32, 1)
+
+    axis = -1
+
+    F1 = 8
+    F1_2 = 16
+    F1_3 = 32
+    F2 = 16
+    F2_2 = 32
+    F2_3 = 64
+    D = 2
+    D2 = 2
+    D3 = 2
+
+    # The three branches are different temporal views of the same trial, so
+    # they share one input tensor and a single wide temporal convolution
+    # instead of three narrow per-branch ones: one GEMM over F1 + F1_2 + F1_3
+    # output channels utilizes Tensor Cores far better than a conv with only
+    # 8 output channels, and one shared BatchNorm replaces three. The
+    # 128-sample kernel subsumes the former per-branch 64/96/128 lengths.
+    # The spatial filters stay per-branch since their widths differ.
+    input1 = Input(shape=input_shape)
+    temporal = Conv2D(F1 + F1_2 + F1_3, conv_filters3, padding='same',
+                      input_shape=input_shape,
+                      use_bias=False, name='fused_temporal')(input1)
+    temporal = BatchNormalization(axis=axis, fused=True)(temporal)
+    block1, block3, block5 = tf.split(temporal, [F1, F1_2, F1_3], axis=-1)
+
+    block1 = SpatialDepthwiseMatmul(depth_multiplier=D)(block1)
+    block1 = BatchNormalization(axis=axis, fused=True)(block1)
+    block1 = Activation('elu')(block1)
+    block1 = AveragePooling2D(pool_size)(block1)
+    if not inference:
+        block1 = dropoutType(dropoutRate)(block1)
+
+    # Explicit depthwise + 1x1 pointwise pair instead of SeparableConv2D so
+    # the graph optimizer can fuse the following BatchNorm + ELU into the
+    # pointwise GEMM's epilogue.
+    block2 = DepthwiseConv2D(separable_filters, use_bias=False,
+                             padding='same')(block1)  # 8
+    block2 = Conv2D(F2, (1, 1), use_bias=False)(block2)
+    block2 = BatchNormalization(axis=axis, fused=True)(block2)
+    block2 = Activation('elu')(block2)
+    block2 = AveragePooling2D(pool_size2)(block2)
+    if not inference:
+        block2 = dropoutType(dropoutRate)(block2)
+    block2 = Flatten()(block2)  # 13
+
+    # 8 - 13
+
+    block3 = SpatialDepthwiseMatmul(depth_multiplier=D2)(block3)
+    block3 = BatchNormalization(axis=axis, fused=True)(block3)
+    block3 = Activation('elu')(block3)
+    block3 = AveragePooling2D(pool_size)(block3)
+    if not inference:
+        block3 = dropoutType(dropoutRate)(block3)
+
+    block4 = DepthwiseConv2D(separable_filters2, use_bias=False,
+                             padding='same')(block3)  # 22
+    block4 = Conv2D(F2_2, (1, 1), use_bias=False)(block4)
+    block4 = BatchNormalization(axis=axis, fused=True)(block4)
+    block4 = Activation('elu')(block4)
+    block4 = AveragePooling2D(pool_size2)(block4)
+    if not inference:
+        block4 = dropoutType(dropoutRate)(block4)
+    block4 = Flatten()(block4)  # 27
+    # 22 - 27
+
+    block5 = SpatialDepthwiseMatmul(depth_multiplier=D3)(block5)
+    block5 = BatchNormalization(axis=axis, fused=True)(block5)
+    block5 = Activation('elu')(block5)
+    block5 = AveragePooling2D(pool_size)(block5)
+    if not inference:
+        block5 = dropoutType(dropoutRate)(block5)
+
+    block6 = DepthwiseConv2D(separable_filters3, use_bias=False,
+                             padding='same')(block5)  # 36
+    block6 = Conv2D(F2_3, (1, 1), use_bias=False)(block6)
+    block6 = BatchNormalization(axis=axis, fused=True)(block6)
+    block6 = Activation('elu')(block6)
+    block6 = AveragePooling2D(pool_size2)(block6)
+    if not inference:
+        block6 = dropoutType(dropoutRate)(block6)
+    block6 = Flatten()(block6)  # 41
+
+    # 36 - 41
+
+    merge_one = concatenate([block2, block4])
+    merge_two = concatenate([merge_one, block6])
+
+    flatten = Flatten()(merge_two)
+
+    dense_units = _round_up8(nb_classes)
+    dense = Dense(dense_units, name='dense', dtype='float32',
+                  kernel_constraint=max_norm(norm_rate))(flatten)
+    if dense_units != nb_classes:
+        dense = dense[:, :nb_classes]
+
+    softmax = Activation('softmax', name='softmax', dtype='float32')(dense)
+
+    return Model(inputs=input1, outputs=softmax)
+
+
+def EEGNet_fusion(nb_classes, Chans=64, Samples=128,
+                  dropoutRate=0.5, norm_rate=0.25, dropoutType='Dropout',
+                  inference=False):
+    template = _eegnet_fusion_template(nb_classes, Chans, Samples, dropoutRate,
+                                       norm_rate, dropoutType, inference,
+                                       mixed_precision.global_policy().name)
+    net = clone_model(template)
+    # Long chains of small ops on tiny tensors - kernel-launch overhead
+    # dominates, so ask for XLA fusion when the model is compiled.
+    net._jit_compile_default = True
+    return net
+
+
+"""
+The implementation of the following models is credited to the Army Research Laboratory (ARL)
+Source: https://github.com/vlawhern/arl-eegmodels
+"""
+
+@functools.lru_cache(maxsize=32)
+def _eegnet_template(nb_classes, Chans, Samples, dropoutRate, kernLength,
+                     F1, D, F2, norm_rate, dropoutType, inference, policy):
+    if dropoutType == 'SpatialDropout2D':
+        dropoutType = SpatialDropout2D
+    elif dropoutType == 'Dropout':
+        dropoutType = Dropout
+    else:
+        raise ValueError('dropoutType must be one of SpatialDropout2D '
+                         'or Dropout, passed as a string.')
+
+    if (F1, F2) != (_round_up8(F1), _round_up8(F2)):
+        warnings.warn('Rounding F1=%d, F2=%d up to multiples of 8 for '
+                      'Tensor Core alignment' % (F1, F2))
+        F1, F2 = _round_up8(F1), _round_up8(F2)
+
+    input_shape = (Samples, Chans, 1)
+    conv_filters = (kernLength, 1)
+    pool_size = (6, 1)
+    pool_size2 = (12, 1)
+    separable_filters = (20, 1)
+    axis = -1
+
+    input1 = Input(shape=input_shape)
+    if kernLength >= 128:
+        # The kernel spans (most of) the signal, which is the regime where an
+        # FFT-domain multiply beats direct im2col convolution.
+        block1 = FFTConv1D_Temporal(F1)(input1)
+    else:
+        block1 = Conv2D(F1, conv_filters, padding='same',
+                        input_shape=input_shape,
+                        use_bias=False)(input1)
+    block1 = BatchNormalization(axis=axis, fused=True)(block1)
+    block1 = SpatialDepthwiseMatmul(depth_multiplier=D)(block1)
+    block1 = BatchNormalization(axis=axis, fused=True)(block1)
+    block1 = Activation('elu')(block1)
+    block1 = AveragePooling2D(pool_size)(block1)
+    if not inference:
+        block1 = dropoutType(dropoutRate)(block1)
+
+    block2 = DepthwiseConv2D(separable_filters, use_bias=False,
+                             padding='same')(block1)
+    block2 = Conv2D(F2, (1, 1), use_bias=False)(block2)
+    block2 = BatchNormalization(axis=axis, fused=True)(block2)
+    block2 = Activation('elu')(block2)
+    block2 = AveragePooling2D(pool_size2)(block2)
+    if not inference:
+        block2 = dropoutType(dropoutRate)(block2)
+
+    flatten = Flatten(name='flatten')(block2)
+
+    # Pad the classifier head to an aligned logit count and slice back so
+    # the GEMM takes the Tensor Core path; the extra logits never reach the
+    # softmax.
+    dense_units = _round_up8(nb_classes)
+    dense = Dense(dense_units, name='dense', dtype='float32',
+                  kernel_constraint=max_norm(norm_rate))(flatten)
+    if dense_units != nb_classes:
+        dense = dense[:, :nb_classes]
+    softmax = Activation('softmax', name='softmax', dtype='float32')(dense)
+
+    return Model(inputs=input1, outputs=softmax)
+
+
+def EEGNet(nb_classes, Chans=64, Samples=128,
+           dropoutRate=0.5, kernLength=64, F1=8,
+           D=2, F2=16, norm_rate=0.25, dropoutType='Dropout',
+           inference=False):
+    template = _eegnet_template(nb_classes, Chans, Samples, dropoutRate,
+                                kernLength, F1, D, F2, norm_rate, dropoutType,
+                                inference,
+                                mixed_precision.global_policy().name)
+    net = clone_model(template)
+    net._jit_compile_default = True
+    return net
+
+
+@functools.lru_cache(maxsize=32)
+def _deep_convnet_template(nb_classes, Chans, Samples, dropoutRate, inference,
+                           policy):
+    input_shape = (Samples, Chans, 1)
+    input_main = Input(input_shape)
+    conv_filters = (2, 1)
+    conv_filters2 = (1, Chans)
+    strides = (2, 1)
+    axis = -1
+
+    # start the model. Each block downsamples by striding its last Conv2D
+    # instead of a trailing MaxPooling2D: one kernel launch less per block,
+    # and the pre-pool tensor is never materialized at full resolution.
+    block1 = Conv2D(25, conv_filters,
+                    input_shape=input_shape)(input_main)
+    block1 = Conv2D(25, conv_filters2, strides=strides)(block1)
+    block1 = BatchNormalization(axis=axis, epsilon=1e-05, momentum=0.1, fused=True)(block1)
+    block1 = Activation('elu')(block1)
+    if not inference:
+        block1 = Dropout(dropoutRate)(block1)
+
+    block2 = Conv2D(50, conv_filters, strides=strides)(block1)
+    block2 = BatchNormalization(axis=axis, epsilon=1e-05, momentum=0.1, fused=True)(block2)
+    block2 = Activation('elu')(block2)
+    if not inference:
+        block2 = Dropout(dropoutRate)(block2)
+
+    block3 = Conv2D(100, conv_filters, strides=strides)(block2)
+    block3 = BatchNormalization(axis=axis, epsilon=1e-05, momentum=0.1, fused=True)(block3)
+    block3 = Activation('elu')(block3)
+    if not inference:
+        block3 = Dropout(dropoutRate)(block3)
+
+    block4 = Conv2D(200, conv_filters, strides=strides)(block3)
+    block4 = BatchNormalization(axis=axis, epsilon=1e-05, momentum=0.1, fused=True)(block4)
+    block4 = Activation('elu')(block4)
+    if not inference:
+        block4 = Dropout(dropoutRate)(block4)
+
+    flatten = Flatten()(block4)
+
+    dense = Dense(nb_classes, dtype='float32',
+                  kernel_constraint=max_norm(0.5))(flatten)
+    softmax = Activation('softmax', dtype='float32')(dense)
+
+    return Model(inputs=input_main, outputs=softmax)
+
+
+def DeepConvNet(nb_classes, Chans=64, Samples=256,
+                dropoutRate=0.5, inference=False):
+    template = _deep_convnet_template(nb_classes, Chans, Samples, dropoutRate,
+                                      inference,
+                                      mixed_precision.global_policy().name)
+    return clone_model(template)
+
+
+# need these for loading ShallowConvNet models saved before LogSquarePool
+def square(x):
+    return K.square(x)
+
+
+def log(x):
+    return K.log(K.clip(x, min_value=1e-7, max_value=10000))
+
+
+# Register them as string-named activations as well: only string-named
+# activations are eligible for the fused conv-epilogue path (callable-based
+# Activation layers opt out of it), and the registration lets previously
+# saved models deserialize without passing a custom_objects dict. Note the
+# square in ShallowConvNet sits after BatchNorm, so it cannot be folded into
+# the preceding Conv2D's epilogue without reordering the math - there it is
+# fused with the pooling inside LogSquarePool instead.
+get_custom_objects()['square'] = square
+get_custom_objects()['log'] = log
+
+
+@functools.lru_cache(maxsize=32)
+def _shallow_convnet_template(nb_classes, Chans, Samples, dropoutRate,
+                              inference, policy):
+    input_shape = (Samples, Chans, 1)
+    conv_filters = (25, 1)
+    conv_filters2 = (1, Chans)
+    pool_size = (45, 1)
+    strides = (15, 1)
+    axis = -1
+
+    input_main = Input(input_shape)
+    block1 = Conv2D(20, conv_filters,
+                    input_shape=input_shape)(input_main)
+    block1 = Conv2D(20, conv_filters2, use_bias=False)(block1)
+    block1 = BatchNormalization(axis=axis, epsilon=1e-05, momentum=0.1, fused=True)(block1)
+    block1 = LogSquarePool(pool_size, strides)(block1)
+    if not inference:
+        block1 = Dropout(dropoutRate)(block1)
+    flatten = Flatten()(block1)
+    dense = Dense(nb_classes, dtype='float32',
+                  kernel_constraint=max_norm(0.5))(flatten)
+    softmax = Activation('softmax', dtype='float32')(dense)
+
+    return Model(inputs=input_main, outputs=softmax)
+
+
+def ShallowConvNet(nb_classes, Chans=64, Samples=128, dropoutRate=0.5,
+                   inference=False):
+    template = _shallow_convnet_template(nb_classes, Chans, Samples,
+                                         dropoutRate, inference,
+                                         mixed_precision.global_policy().name)
+    net = clone_model(template)
+    net._jit_compile_default = True
+    return net
+
+
+def to_int8_tflite(net, rep_dataset):
+    """Convert a trained Keras model to a fully-integer INT8 TFLite model.
+
+    rep_dataset is a generator yielding lists of sample input batches, as
+    expected by TFLiteConverter.representative_dataset; it is used to
+    calibrate the activation quantization ranges. Inputs are quantized to
+    int8 while the softmax output stays float32.
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(net)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = rep_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    return converter.convert()
+
+
+def build_quantized_eegnet(nb_classes, rep_dataset, **kwargs):
+    """Build an EEGNet and return its INT8 TFLite flatbuffer.
+
+    The model is built under a float32 policy (the TFLite quantizer expects
+    fp32 graphs, not mixed_float16) and converted with to_int8_tflite; any
+    extra kwargs are forwarded to EEGNet.
+    """
+    policy = mixed_precision.global_policy()
+    mixed_precision.set_global_policy('float32')
+    try:
+        net = EEGNet(nb_classes, **kwargs)
+    finally:
+        mixed_precision.set_global_policy(policy)
+    return to_int8_tflite(net, rep_dataset)
+
+
+def get_models(trial_type, nb_classes, samples):
+    return {
+        'EEGNet_fusion': model.Model('EEGNet_fusion', trial_type, [(0, 8), (14, 22), (28, 36)],
+                                     EEGNet_fusion(nb_classes, Samples=samples)),
+        'EEGNet': model.Model('EEGNet', trial_type, [(0, 8)], EEGNet(nb_classes, Samples=samples)),
+        'ShallowConvNet': model.Model('ShallowConvNet', trial_type, [(0, 2)],
+                                      ShallowConvNet(nb_classes, Samples=samples),
+                                      extra_callbacks=[MaxNormCallback(2., axes=(0, 1, 2))]),
+        'DeepConvNet': model.Model('DeepConvNet', trial_type, [(0, 8), (14, 22), (28, 36)],
+                                   DeepConvNet(nb_classes, Samples=samples),
+                                   extra_callbacks=[MaxNormCallback(2., axes=(0, 1, 2))]),
+    }
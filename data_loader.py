@@ -24,7 +24,7 @@ The data is also preprocessed using if the preprocessing argument is True.
 
 
 def load_data(nr_of_subj=109, trial_type=1, chunk_data=True, chunks=4, base_folder='data/', sample_rate=160,
-              samples=640, cpu_format=False, preprocessing=False, hp_freq=0.5, bp_low=2, bp_high=60, notch=False,
+              samples=640, preprocessing=False, hp_freq=0.5, bp_low=2, bp_high=60, notch=False,
               hp_filter=False, bp_filter=False, artifact_removal=False):
     # Get file paths
     PATH = base_folder
@@ -161,22 +161,16 @@ def load_data(nr_of_subj=109, trial_type=1, chunk_data=True, chunks=4, base_fold
                 signal_start += int(sample_rate * current_duration)
                 k += 1
 
-            # Add labels and data for the current run into the final output numpy arrays
+            # Add labels and data for the current run into the final output numpy arrays.
+            # The output is always in the channels_last (samples, channels) ordering the
+            # models expect on both CPU and GPU.
             y.extend(labels)
-            if cpu_format:
-                if chunk_data:
-                    # (15, 64, 8, 80) => (15, 64, 80, 8) => (15, 8, 80, 64) => (120, 80, 64)
-                    X.extend(trial_data.swapaxes(2, 3).swapaxes(1, 3).reshape((-1, samples_per_chunk, 64)))
-                else:
-                    # (15, 64, 640) => (15, 640, 64)
-                    X.extend(trial_data.swapaxes(1, 2))
+            if chunk_data:
+                # (15, 64, 8, 80) => (15, 64, 80, 8) => (15, 8, 80, 64) => (120, 80, 64)
+                X.extend(trial_data.swapaxes(2, 3).swapaxes(1, 3).reshape((-1, samples_per_chunk, 64)))
             else:
-                if chunk_data:
-                    # (15, 64, 8, 80) => (15, 8, 64, 80) => (120, 64, 80)
-                    X.extend(trial_data.swapaxes(1, 2).reshape((-1, 64, samples_per_chunk)))
-                else:
-                    # (15, 64, 640)
-                    X.extend(trial_data)
+                # (15, 64, 640) => (15, 640, 64)
+                X.extend(trial_data.swapaxes(1, 2))
 
     # Shape the final output arrays to the correct format
     X = np.stack(X)
@@ -7,8 +7,9 @@ __author__ = "Karel Roots"
 """
 Class for holding data about a given model under evaluation.
 Includes the model name (String), trial type (0 - Executed or 1 - Imagined),
-the layers to disable during transfer learning (List), the Tensorflow model object and
-if the model uses multiple branches.
+the layers to disable during transfer learning (List), the Tensorflow model object,
+if the model uses multiple branches and any extra Keras callbacks the model needs
+during training.
 
 After the experiment has been run on the model, the data about model accuracy can be accessed.
 """
@@ -16,12 +17,14 @@ After the experiment has been run on the model, the data about model accuracy ca
 
 class Model(object):
 
-    def __init__(self, model_name, trial_type, disabled_layers, model, multi_branch=False):
+    def __init__(self, model_name, trial_type, disabled_layers, model, multi_branch=False,
+                 extra_callbacks=None):
         self.model_name = model_name + '_' + trial_type.name
         self.trial_type = trial_type
         self.disabled_layers = disabled_layers
         self.multi_branch = multi_branch
         self.model = model
+        self.extra_callbacks = extra_callbacks if extra_callbacks is not None else []
         self.equals = []
         self.accuracy = 0
 
@@ -40,6 +43,9 @@ class Model(object):
     def get_mb(self):
         return self.multi_branch
 
+    def get_extra_callbacks(self):
+        return self.extra_callbacks
+
     def set_equals(self, equals):
         self.equals = equals
 
@@ -18,7 +18,7 @@ from run_type import RunType
 
 """
 Required dependencies: 
-Python == 3.7.7, Tensorflow == 2.1.0, Numpy >= 1.18.1, scikit-learn >= 0.22.1, pyEDFlib >= 0.1.17
+Python >= 3.7, Tensorflow == 2.9.1, Numpy >= 1.22.4, scikit-learn >= 0.22.1, pyEDFlib >= 0.1.17
 statsmodels >= 0.11.1, Gumpy (https://github.com/gumpy-bci/gumpy)
 The program can be run from the CLI with the following required arguments:
 1.) The number of subjects to be used from the dataset (int)
@@ -50,7 +50,7 @@ subj_for_training = 100  # The number of subjects that should be used for pre-tr
 subj_for_transfer_learning = 3  # The number of subject that should be used for individual evaluation of the TL model
 
 # Loading data from files
-X, y = load_data(nr_of_subj=nr_of_subj, trial_type=trial_type, chunk_data=True, chunks=8, cpu_format=use_cpu,
+X, y = load_data(nr_of_subj=nr_of_subj, trial_type=trial_type, chunk_data=True, chunks=8,
                  preprocessing=True, hp_freq=0.5, bp_low=2, bp_high=60, notch=True,
                  hp_filter=False, bp_filter=True, artifact_removal=True)
 
@@ -62,17 +62,11 @@ X, y = load_data(nr_of_subj=nr_of_subj, trial_type=trial_type, chunk_data=True,
 # X = data['data']
 # y = data['labels']
 
-# Data formatting
-if use_cpu:
-    print("Using CPU")
-    K.set_image_data_format('channels_last')
-    samples = X.shape[1]
-    X = X.reshape(X.shape[0], X.shape[1], X.shape[2], 1)
-else:
-    print("Using GPU")
-    K.set_image_data_format('channels_first')
-    samples = X.shape[2]
-    X = X.reshape(X.shape[0], 1, X.shape[1], X.shape[2])
+# Data formatting - all models use the NHWC ("channels_last") layout on both CPU and GPU
+print("Using CPU" if use_cpu else "Using GPU")
+K.set_image_data_format('channels_last')
+samples = X.shape[1]
+X = X.reshape(X.shape[0], X.shape[1], X.shape[2], 1)
 y = to_categorical(y, nb_classes)
 
 print("X shape: {}".format(X.shape))
@@ -88,7 +82,7 @@ for directory in DIR:
 experiments = []
 
 # test models with all subjects
-experiment_103sub = Experiment(trial_type, '103sub', get_models(trial_type, nb_classes, samples, use_cpu), nr_of_epochs,
+experiment_103sub = Experiment(trial_type, '103sub', get_models(trial_type, nb_classes, samples), nr_of_epochs,
                                0.125, 0.2)
 experiments.append(run_experiment(X, y, experiment_103sub))
 
@@ -31,7 +31,7 @@ if the prediction at index i was equal to the target label (List)
 
 
 def train_test_model(model, model_name, X_train, y_train, X_val, y_val, X_test, y_test, multi_branch, nr_of_epochs,
-                     test_model=True):
+                     test_model=True, extra_callbacks=None):
     MODEL_LIST = glob('./model/*')
     new_model_name = './model/' + str(model_name) + '_' + str(len(MODEL_LIST)) + '.h5'
     print("New model name: " + new_model_name)
@@ -45,8 +45,13 @@ def train_test_model(model, model_name, X_train, y_train, X_val, y_val, X_test,
                                                 monitor='val_loss'),
                       # callbacks.EarlyStopping(monitor='val_acc', patience=25),
                       callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.1, patience=5)]
+    if extra_callbacks:
+        callbacks_list.extend(extra_callbacks)
 
-    model.compile(loss=binary_crossentropy, optimizer=Adam(lr=0.001), metrics=['accuracy'])
+    # The small models opt into XLA via _jit_compile_default so that the
+    # Conv2D -> BatchNorm -> ELU -> Pool chains fuse into single kernels
+    model.compile(loss=binary_crossentropy, optimizer=Adam(lr=0.001), metrics=['accuracy'],
+                  jit_compile=getattr(model, '_jit_compile_default', False))
 
     training_start = time.time()
     if multi_branch:
@@ -103,12 +108,9 @@ Method that splits the input data into training and testing sets and evaluates t
 """
 
 
-def run_experiment(X, y, experiment, use_cpu=False, test_model=True):
-    # Set the data format
-    if use_cpu:
-        K.set_image_data_format('channels_last')
-    else:
-        K.set_image_data_format('channels_first')
+def run_experiment(X, y, experiment, test_model=True):
+    # Set the data format - all models use the NHWC ("channels_last") layout
+    K.set_image_data_format('channels_last')
 
     # training/validation/test set split
     test_split = experiment.get_test_split()
@@ -128,7 +130,8 @@ def run_experiment(X, y, experiment, use_cpu=False, test_model=True):
 
         # splitting training/testing sets
         _model, acc, equals = train_test_model(_model, model_name, X_train, y_train, X_val, y_val, X_test, y_test,
-                                               multi_branch, experiment.get_epochs(), test_model=test_model)
+                                               multi_branch, experiment.get_epochs(), test_model=test_model,
+                                               extra_callbacks=model.get_extra_callbacks())
         _model.save('./model/' + str(model_name) + '_best.h5')
 
         model.set_accuracy(acc)